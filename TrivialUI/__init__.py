@@ -1,8 +1,169 @@
-from PySide.QtCore import QAbstractItemModel, QModelIndex, Qt
+from PySide.QtCore import (QAbstractItemModel, QModelIndex, Qt, QObject,
+                           QTimer, Signal, Slot)
 from PySide.QtGui import (QApplication, QMainWindow, QTreeView, QWidget,
                           QPushButton, QFormLayout, QLineEdit, QLabel,
-                          QAction, QVBoxLayout)
+                          QAction, QVBoxLayout, QAbstractItemView,
+                          QCompleter, QStringListModel)
+from array import array
+from collections import OrderedDict
+from timeit import default_timer
+import bisect
 import contextlib
+import hashlib
+import heapq
+import itertools
+import numbers
+import threading
+import traceback
+
+try:
+    from collections.abc import Mapping, Sequence, Set
+except ImportError:
+    from collections import Mapping, Sequence, Set
+
+try:
+    import reprlib
+except ImportError:
+    import repr as reprlib
+
+_string_types = (str, bytes, bytearray, type(u''))
+
+
+def _split_row(row):
+    """Split a row of list data into the items to display and the
+    nested list (if any) holding its children.
+    """
+    def is_child_list(x): return isinstance(x, list)
+
+    child_lists = [x for x in row if is_child_list(x)]
+    display_items = [x for x in row if not is_child_list(x)]
+
+    if child_lists:
+        return display_items, child_lists[0]
+    else:
+        return display_items, None
+
+
+def _column_value(row, column):
+    display_items, _ = _split_row(row)
+    if column < len(display_items):
+        return display_items[column]
+    else:
+        return None
+
+
+# The sort key for a missing value, that is None or NaN. These rows go
+# at the end whichever direction a column is sorted in.
+_missing_key = (3, 0)
+
+
+def _sort_key(value):
+    if value is None or value != value:
+        return _missing_key
+    elif isinstance(value, numbers.Real):
+        return (0, value)
+    elif isinstance(value, (bytes, bytearray)) and not isinstance(value, str):
+        # Bytes can't be compared with text, so they're kept apart.
+        return (2, value)
+    elif isinstance(value, _string_types):
+        return (1, value)
+    else:
+        return (1, str(value))
+
+
+def _sort_keys(values):
+    """Make the sort keys for a column. If the values are all numbers
+    that fit exactly in a double, this is a compact array of them,
+    otherwise it's a list of `_sort_key` tuples.
+    """
+    if all(isinstance(x, numbers.Real) and x == x and
+           -2 ** 53 <= x <= 2 ** 53 for x in values):
+        return array('d', values)
+    else:
+        return [_sort_key(x) for x in values]
+
+
+def _display_text(data, column):
+    try:
+        if data[column] is None:
+            return ""
+        else:
+            return str(data[column])
+    except IndexError:
+        return ""
+
+
+def _count_columns(rows, widths=None, ancestors=None):
+    """Find the number of columns needed to display list data, which
+    is the width of its widest leaf row.
+
+    This works on the data itself rather than through proxies. Each
+    distinct sub-list is only measured once, however many rows refer
+    to it, and a sub-list that contains itself is treated like a
+    back reference.
+    """
+    if not rows:
+        return 1
+
+    if widths is None:
+        widths = {}
+        ancestors = set()
+
+    ancestors.add(id(rows))
+    widest = 0
+    for row in rows:
+        display_items, child_list = _split_row(row)
+        if child_list is None:
+            width = len(row)
+        elif id(child_list) in ancestors:
+            width = len(display_items)
+        elif id(child_list) in widths:
+            width = widths[id(child_list)]
+        else:
+            width = _count_columns(child_list, widths, ancestors)
+        widest = max(widest, width)
+    ancestors.discard(id(rows))
+
+    widths[id(rows)] = widest
+    return widest
+
+
+class ContainerState(object):
+    """The state for a single container object that is expensive to
+    compute, and so is shared between all the proxies that view the
+    same object. At the moment that's the row order of a dict, which
+    would otherwise be rebuilt for every child.
+
+    """
+
+    __slots__ = ('container', '_items')
+
+    def __init__(self, container):
+        self.container = container
+        self._items = None
+
+    @classmethod
+    def lookup(cls, states, container):
+        """Find the state for `container` in the `states` registry,
+        creating it if this is the first time the container has been
+        seen. The registry is keyed on object identity, and holds a
+        reference to the container so that the id can't be reused.
+        """
+        try:
+            return states[id(container)]
+        except KeyError:
+            state = cls(container)
+            states[id(container)] = state
+            return state
+
+    def items(self):
+        """The (key, value) pairs of a dict container, in row order. These
+        are worked out again if the dict has changed size since they
+        were last needed.
+        """
+        if self._items is None or len(self._items) != len(self.container):
+            self._items = list(self.container.items())
+        return self._items
 
 
 class GenericProxy(object):
@@ -11,16 +172,40 @@ class GenericProxy(object):
     allow various different sorts of Python data to be navigated in
     this way.
 
+    A proxy is needed for each path through the data that Qt asks
+    about, because Qt requires every node to have a single parent, so
+    proxies are kept as small as possible and only made on demand.
+    Anything that is expensive to work out about a container goes in
+    a `ContainerState`, which is shared through the `states` registry
+    between all the proxies viewing the same object.
+
     """
 
-    def __init__(self, data, children, parent=None, row=0):
+    __slots__ = ('data', 'children', 'parent', 'row', 'child_cache',
+                 'states', '_shared')
+
+    def __init__(self, data, children, parent=None, row=0, states=None):
         assert children is not None
 
+        if states is None:
+            states = parent.states if parent is not None else {}
+
         self.data = data
         self.children = children
         self.parent = parent
         self.row = row
         self.child_cache = {}
+        self.states = states
+        self._shared = None
+
+    @property
+    def shared(self):
+        """The `ContainerState` for the children, which is only looked up
+        when it's first needed.
+        """
+        if self._shared is None:
+            self._shared = ContainerState.lookup(self.states, self.children)
+        return self._shared
 
     def hasChild(self, row):
         """Check whether this dict has an entry for the specified row. In
@@ -41,6 +226,26 @@ class GenericProxy(object):
             self.child_cache[row] = child
             return child
 
+    def findAncestor(self, container):
+        """Find the proxy, from this one up to the root, that is viewing
+        `container`, or None if there is no such proxy. This is used
+        to detect cycles in the data.
+        """
+        proxy = self
+        while proxy is not None:
+            if proxy.children is container:
+                return proxy
+            proxy = proxy.parent
+        return None
+
+    def setChildren(self, children):
+        """Point this proxy at a different container. Any child proxies
+        that have already been made are kept, so it's up to the caller
+        to fix up the ones that no longer match.
+        """
+        self.children = children
+        self._shared = None
+
 
 class DictProxy(GenericProxy):
     """Proxy object for making a dict of dicts navigable in a form
@@ -50,37 +255,76 @@ class DictProxy(GenericProxy):
     OrderedDict.
     """
 
+    __slots__ = ()
+
     def makeChild(self, row):
-        items = list(self.children.items())
-        key, childItem = items[row]
+        key, childItem = self.shared.items()[row]
         if isinstance(childItem, dict):
+            ancestor = self.findAncestor(childItem)
+            if ancestor is not None:
+                return BackReferenceProxy(key, ancestor, self, row)
             return DictProxy(key, childItem, self, row)
         else:
-            return LeafProxy(key, None, childItem, self)
+            return LeafProxy(key, None, childItem, self, row)
 
 
 class ListProxy(GenericProxy):
-    def makeChild(self, row):
-        def is_child_list(x): return isinstance(x, list)
+    __slots__ = ()
+
+    def insertChild(self, row, value):
+        """Insert `value` into the children at `row`, moving the proxies
+        already made for later rows along to match.
+        """
+        self.children.insert(row, value)
+        self._moveRows(row, 1)
+
+    def reorder(self, children, new_rows):
+        """Replace the children with `children`, which is a rearrangement
+        of the current ones such that the child at row r is now at
+        row new_rows[r].
+        """
+        self.setChildren(children)
+
+        child_cache = {}
+        for row, child in self.child_cache.items():
+            row = new_rows[row]
+            child.row = row
+            child_cache[row] = child
+        self.child_cache = child_cache
+
+    def removeChild(self, row):
+        del self.children[row]
+        self.child_cache.pop(row, None)
+        self._moveRows(row + 1, -1)
+
+    def _moveRows(self, start, delta):
+        child_cache = {}
+        for row, child in self.child_cache.items():
+            if row >= start:
+                row += delta
+                child.row = row
+            child_cache[row] = child
+        self.child_cache = child_cache
 
-        child_lists = [x
-                       for x in self.children[row]
-                       if is_child_list(x)]
-        display_items = [x
-                         for x in self.children[row]
-                         if not is_child_list(x)]
+    def makeChild(self, row):
+        display_items, child_list = _split_row(self.children[row])
 
-        if child_lists:
-            return ListProxy(display_items, child_lists[0], self)
+        if child_list is not None:
+            ancestor = self.findAncestor(child_list)
+            if ancestor is not None:
+                return BackReferenceProxy(display_items, ancestor, self, row)
+            return ListProxy(display_items, child_list, self, row)
         else:
             return LeafProxy(self.children[row],
                              self.children[row],
                              self.children[row],
-                             self)
+                             self, row)
 
 
 class LeafProxy(object):
-    def __init__(self, key, click_target, data, parent=None):
+    __slots__ = ('data', 'parent', 'key', 'click_target', 'row')
+
+    def __init__(self, key, click_target, data, parent=None, row=0):
         """
         :param key:  The key that identifies this leaf as an
                      entry in the parent data.
@@ -89,6 +333,7 @@ class LeafProxy(object):
         self.parent = parent
         self.key = key
         self.click_target = click_target
+        self.row = row
 
     def hasChild(self, row):
         return False
@@ -100,6 +345,315 @@ class LeafProxy(object):
         return 0
 
 
+class BackReferenceProxy(LeafProxy):
+    """A leaf standing in for a container that is already being shown
+    further up the tree, so that self-referencing data doesn't expand
+    forever.
+    """
+
+    __slots__ = ('target',)
+
+    def __init__(self, data, target, parent, row=0):
+        """
+        :param target:  The ancestor proxy that is already viewing
+                        the container.
+        """
+        super(BackReferenceProxy, self).__init__(data, target, data, parent,
+                                                 row)
+
+        self.target = target
+
+
+class _Chunk(object):
+    """A range of the entries of a large container. This stands in for
+    them in the inspector, so that they aren't looked at until the
+    range is expanded.
+    """
+
+    def __init__(self, container, start, stop):
+        self.container = container
+        self.start = start
+        self.stop = stop
+
+    def __repr__(self):
+        return "%d items" % (self.stop - self.start)
+
+
+class _ObjectEntries(object):
+    """The children of an object in the inspector, as a sequence of
+    (label, value) pairs.
+
+    Containers are split into chunks of at most `chunk_size` entries,
+    nested as deeply as is needed. Values are only looked up when an
+    entry is asked for, and attribute names only when the length is.
+
+    """
+
+    def __init__(self, obj, chunk_size, repr_limits):
+        self.obj = obj
+        self.chunk_size = chunk_size
+        self.repr_limits = repr_limits
+        self._names = None
+        self._keys = None
+
+        if isinstance(obj, _Chunk):
+            self.container = obj.container
+            self.start, self.stop = obj.start, obj.stop
+        elif (isinstance(obj, (Mapping, Set)) or
+              (isinstance(obj, Sequence) and
+               not isinstance(obj, _string_types) and
+               not hasattr(obj, '_fields'))):
+            self.container = obj
+            self.start, self.stop = 0, len(obj)
+        else:
+            self.container = None
+
+        if self.container is not None:
+            # The number of entries each chunk covers at this level.
+            self.span = 1
+            while self.stop - self.start > self.span * chunk_size:
+                self.span *= chunk_size
+
+    def hasEntries(self):
+        """A cheap check for whether there are any entries, which doesn't
+        look at the attribute names.
+        """
+        if self.container is not None:
+            return self.stop > self.start
+        elif hasattr(self.obj, '_fields'):
+            return bool(self.obj._fields)
+        elif hasattr(self.obj, '__dataclass_fields__'):
+            return bool(self.obj.__dataclass_fields__)
+        else:
+            return bool(getattr(self.obj, '__dict__', None) or
+                        getattr(self.obj, '__slots__', None))
+
+    def _attributeNames(self):
+        if self._names is None:
+            obj = self.obj
+            if hasattr(obj, '_fields'):
+                self._names = list(obj._fields)
+            elif hasattr(obj, '__dataclass_fields__'):
+                self._names = list(obj.__dataclass_fields__)
+            else:
+                names = set(getattr(obj, '__dict__', None) or ())
+                for cls in type(obj).__mro__:
+                    slots = cls.__dict__.get('__slots__', ())
+                    if isinstance(slots, _string_types):
+                        slots = [slots]
+                    names.update(x for x in slots
+                                 if x not in ('__dict__', '__weakref__'))
+                self._names = sorted(names)
+        return self._names
+
+    def _chunkKeys(self):
+        # Mappings and sets can't be indexed by position, so the keys
+        # for this chunk are collected the first time they're needed.
+        if self._keys is None:
+            iterator = iter(self.container)
+            for _ in range(self.start):
+                next(iterator)
+            self._keys = [next(iterator)
+                          for _ in range(self.stop - self.start)]
+        return self._keys
+
+    def __len__(self):
+        if self.container is None:
+            return len(self._attributeNames())
+        else:
+            return -(-(self.stop - self.start) // self.span)
+
+    def __getitem__(self, row):
+        if self.container is None:
+            name = self._attributeNames()[row]
+            try:
+                return name, getattr(self.obj, name)
+            except Exception as e:
+                return name, e
+
+        if self.span > 1:
+            start = self.start + row * self.span
+            stop = min(start + self.span, self.stop)
+            label = "[%d..%d]" % (start, stop - 1)
+            return label, _Chunk(self.container, start, stop)
+
+        index = self.start + row
+        if isinstance(self.container, Mapping):
+            key = self._chunkKeys()[row]
+            label = str(_ValueText(key, self.repr_limits))
+            return label, self.container[key]
+        elif isinstance(self.container, Set):
+            return "[%d]" % index, self._chunkKeys()[row]
+        else:
+            return "[%d]" % index, self.container[index]
+
+
+class _LimitedRepr(reprlib.Repr):
+    """A reprlib.Repr whose cost doesn't depend on the size of the
+    object being shown.
+
+    reprlib only abbreviates the built-in containers, and formats
+    anything else in full with its own __repr__ before cutting it
+    short, which could take any amount of time. Instead, objects with
+    named fields are shown through them, other containers like the
+    built-in ones, and anything else just by its type. Dicts and sets
+    are also shown in their own order, rather than sorting them.
+
+    """
+
+    _plain_types = (bool, float, complex, type(None))
+
+    def repr_instance(self, x, level):
+        name = type(x).__name__
+        if type(x) in self._plain_types:
+            return repr(x)
+        elif isinstance(x, _string_types):
+            return self.repr_str(x, level)
+        elif hasattr(x, '_fields') or hasattr(x, '__dataclass_fields__'):
+            return self._repr_fields(x, level)
+        elif isinstance(x, Mapping):
+            return "%s(%s)" % (name, self.repr_dict(x, level))
+        elif isinstance(x, (Sequence, Set)):
+            return "%s(%s)" % (name, self.repr_list(x, level))
+        else:
+            return "<%s object>" % name
+
+    def _repr_fields(self, x, level):
+        name = type(x).__name__
+        if level <= 0:
+            return "%s(...)" % name
+
+        fields = getattr(x, '_fields', None)
+        if fields is None:
+            fields = list(x.__dataclass_fields__)
+        pieces = ["%s=%s" % (field, self.repr1(getattr(x, field), level - 1))
+                  for field in fields[:self.maxlist]]
+        if len(fields) > self.maxlist:
+            pieces.append("...")
+        return "%s(%s)" % (name, ", ".join(pieces))
+
+    def repr_dict(self, x, level):
+        if not x:
+            return "{}"
+        if level <= 0:
+            return "{...}"
+
+        pieces = ["%s: %s" % (self.repr1(key, level - 1),
+                              self.repr1(x[key], level - 1))
+                  for key in itertools.islice(x, self.maxdict)]
+        if len(x) > self.maxdict:
+            pieces.append("...")
+        return "{%s}" % ", ".join(pieces)
+
+    def repr_set(self, x, level):
+        if not x:
+            return "set()"
+        return self._repr_iterable(x, level, "{", "}", self.maxset)
+
+    def repr_frozenset(self, x, level):
+        if not x:
+            return "frozenset()"
+        return self._repr_iterable(x, level, "frozenset({", "})",
+                                   self.maxfrozenset)
+
+
+class _ValueText(object):
+    """The text for the value column of the inspector, which is only
+    worked out the first time it's displayed.
+    """
+
+    def __init__(self, obj, repr_limits):
+        self.obj = obj
+        self.repr_limits = repr_limits
+        self._text = None
+
+    def __str__(self):
+        if self._text is not None:
+            return self._text
+
+        limits = self.repr_limits
+        try:
+            text = limits.repr(self.obj)
+        except Exception as e:
+            text = "<repr failed: %s>" % type(e).__name__
+
+        if len(text) > limits.maxother:
+            text = text[:limits.maxother - 3] + "..."
+        self._text = text
+        return text
+
+
+class ObjectProxy(GenericProxy):
+    """Proxy object for browsing arbitrary Python objects, with the
+    columns name, type and value.
+
+    Dicts, sequences and sets show their entries, and other objects
+    show their attributes. Nothing about an object's children is
+    looked at until the node is expanded.
+
+    """
+
+    def __init__(self, name, obj, parent=None, row=0, chunk_size=1000,
+                 max_depth=None, repr_limits=None):
+        """
+        :param chunk_size:   The most entries of a container to show
+                             at one level. Bigger containers are
+                             split into ranges.
+        :param max_depth:    The depth beyond which nodes can't be
+                             expanded, or None for no limit.
+        :param repr_limits:  A reprlib.Repr that caps how much of a
+                             value is formatted for display. The
+                             default never calls a value's own
+                             __repr__.
+        """
+        if parent is not None:
+            chunk_size = parent.chunk_size
+            max_depth = parent.max_depth
+            repr_limits = parent.repr_limits
+            # The ranges of a big container are part of the level of
+            # the container, rather than one of their own.
+            if isinstance(obj, _Chunk):
+                depth = parent.depth
+            else:
+                depth = parent.depth + 1
+        else:
+            depth = 0
+
+        if repr_limits is None:
+            repr_limits = _LimitedRepr()
+
+        self.name = name
+        self.obj = obj
+        self.chunk_size = chunk_size
+        self.max_depth = max_depth
+        self.repr_limits = repr_limits
+        self.depth = depth
+
+        self.expandable = max_depth is None or depth <= max_depth
+        if self.expandable:
+            children = _ObjectEntries(obj, chunk_size, repr_limits)
+        else:
+            children = ()
+
+        if isinstance(obj, _Chunk):
+            data = (name, "", repr(obj))
+        else:
+            data = (name, type(obj).__name__,
+                    _ValueText(obj, repr_limits))
+
+        super(ObjectProxy, self).__init__(data, children, parent, row)
+
+    def mayHaveChildren(self):
+        """Whether the node can be expanded. Unlike childCount(), this
+        doesn't need to look at the children themselves.
+        """
+        return self.expandable and self.children.hasEntries()
+
+    def makeChild(self, row):
+        name, value = self.children[row]
+        return ObjectProxy(name, value, self, row)
+
+
 class GenericModel(QAbstractItemModel):
     def __init__(self, header=None):
         super(GenericModel, self).__init__(None)
@@ -134,8 +688,12 @@ class GenericModel(QAbstractItemModel):
         if not childIndex.isValid():
             return QModelIndex()
 
+        # The root item is the invisible parent of the top-level rows,
+        # and Qt has to see it as the invalid index, or it won't match
+        # up the rows below it when they're moved or removed.
         childItem = childIndex.internalPointer()
-        if childItem.parent is not None:
+        if (childItem.parent is not None and
+                childItem.parent is not self.root_item):
             return self.createIndex(childItem.parent.row, 0, childItem.parent)
         else:
             return QModelIndex()
@@ -151,13 +709,10 @@ class GenericModel(QAbstractItemModel):
             return None
 
         item = index.internalPointer()
-        try:
-            if item.data[index.column()] is None:
-                return ""
-            else:
-                return str(item.data[index.column()])
-        except IndexError:
-            return ""
+        text = _display_text(item.data, index.column())
+        if index.column() == 0 and isinstance(item, BackReferenceProxy):
+            return "<cycle: %s>" % text
+        return text
 
     def headerData(self, section, orientation, role):
         if role != Qt.DisplayRole:
@@ -189,6 +744,10 @@ class ListModel(GenericModel):
     object stored as self.root_item. The tree is constructed on the
     fly as Qt queries using the index() method.
 
+    The top-level rows can be sorted by several columns at once. The
+    sort keys for each column are extracted once and cached, and the
+    data passed in is never reordered itself.
+
     """
 
     def __init__(self, data, header=None):
@@ -200,32 +759,396 @@ class ListModel(GenericModel):
         super(ListModel, self).__init__(header)
 
         self.root_item = ListProxy([], data)
-        self.num_columns = self._find_num_columns(self.root_item)
+        self.num_columns = _count_columns(data)
+
+        # The rows in their original order, and the cached sort keys
+        # for each column, indexed in the same way.
+        self.source = list(data)
+        self.sort_keys = {}
+
+        # A list of (column, order) pairs, most significant first,
+        # and the permutation of the source rows that it gives.
+        self.sort_order = []
+        self.permutation = None
 
-    def _find_num_columns(self, data):
+    def columnCount(self, parent):
+        return self.num_columns
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Implementation of a virtual base function from Qt, called when
+        a column header is clicked. The column becomes the most
+        significant sort key, and the previous keys are kept to break
+        ties. A column of -1 puts the rows back in their original
+        order.
         """
-        Find the number of columns to use to display this data.
+        if column < 0:
+            self.sort_by([])
+            return
+
+        self.sort_by([(column, order)] +
+                     [x for x in self.sort_order if x[0] != column])
+
+    def sort_by(self, sort_order):
+        """Sort the top-level rows.
+
+        :param sort_order:  A list of (column, order) pairs, most
+                            significant first, where order is
+                            Qt.AscendingOrder or Qt.DescendingOrder.
+                            Rows that compare equal keep their
+                            original order. An empty list
+                            unsorts the rows.
         """
-        if isinstance(data, LeafProxy):
-            try:
-                return len(data.data)
-            except AttributeError:
-                return 1
-        elif isinstance(data, ListProxy) and data.childCount():
-            return max(self._find_num_columns(data.childAt(i))
-                       for i in range(data.childCount()))
+        sort_order = list(sort_order)
+        permutation = self._sort_permutation(sort_order)
+        self.sort_order = sort_order
+
+        if self.permutation is None:
+            old_permutation = range(len(self.source))
         else:
-            return 1
+            old_permutation = self.permutation
 
-    def columnCount(self, parent):
-        return self.num_columns
+        new_row_of_source = [0] * len(permutation)
+        for row, source_row in enumerate(permutation):
+            new_row_of_source[source_row] = row
+        new_rows = [new_row_of_source[x] for x in old_permutation]
 
+        self._rearrange([self.source[x] for x in permutation],
+                        permutation if sort_order else None, new_rows)
 
-class DictTreeView(object):
-    def __init__(self, data):
-        self.data = data
-        self.treeView = QTreeView()
-        self.treeView.setModel(DictModel(self.data))
+    def _rearrange(self, children, permutation, new_rows):
+        """Switch the top-level rows to `children`, telling Qt about it
+        as a single layout change.
+
+        :param permutation:  The source rows in their new order.
+        :param new_rows:     The new row for each of the current rows.
+        """
+        self.layoutAboutToBeChanged.emit()
+
+        self.root_item.reorder(children, new_rows)
+        self.permutation = permutation
+
+        old_indexes = [x for x in self.persistentIndexList()
+                       if not x.parent().isValid()]
+        self.changePersistentIndexList(
+            old_indexes,
+            [self.createIndex(new_rows[x.row()], x.column(),
+                              x.internalPointer())
+             for x in old_indexes])
+
+        self.layoutChanged.emit()
+
+    def _column_sort_keys(self, column):
+        if column not in self.sort_keys:
+            self.sort_keys[column] = _sort_keys(
+                [_column_value(x, column) for x in self.source])
+        return self.sort_keys[column]
+
+    def _sort_permutation(self, sort_order):
+        old_order = self.sort_order
+
+        if (self.permutation is not None and sort_order and
+                len(sort_order) == len(old_order) and
+                sort_order[0][0] == old_order[0][0] and
+                sort_order[0][1] != old_order[0][1] and
+                sort_order[1:] == old_order[1:]):
+            # Only the direction of the main key has changed, so the
+            # existing order just needs the runs of rows with equal
+            # keys reversing, rather than a full sort.
+            keys = self._column_sort_keys(sort_order[0][0])
+            end = len(self.permutation)
+            while end > 0 and keys[self.permutation[end - 1]] == _missing_key:
+                end -= 1
+            missing = self.permutation[end:]
+
+            permutation = []
+            while end > 0:
+                start = end - 1
+                key = keys[self.permutation[start]]
+                while start > 0 and keys[self.permutation[start - 1]] == key:
+                    start -= 1
+                permutation.extend(self.permutation[start:end])
+                end = start
+            return permutation + missing
+
+        return self._sort_rows(list(range(len(self.source))), sort_order)
+
+    def _sort_rows(self, rows, sort_order):
+        """Sort a list of source rows, with a stable sort on each key in
+        turn, least significant first.
+        """
+        for column, order in reversed(sort_order):
+            keys = self._column_sort_keys(column)
+            if order == Qt.DescendingOrder:
+                rows.sort(key=keys.__getitem__, reverse=True)
+                # That puts the missing values first, as one block, so
+                # they're moved to the end.
+                count = 0
+                while count < len(rows) and keys[rows[count]] == _missing_key:
+                    count += 1
+                rows = rows[count:] + rows[:count]
+            else:
+                rows.sort(key=keys.__getitem__)
+        return rows
+
+    def _compare_rows(self, a, b):
+        """Compare two source rows under the current sort order."""
+        for column, order in self.sort_order:
+            keys = self._column_sort_keys(column)
+            if keys[a] != keys[b]:
+                if keys[b] == _missing_key:
+                    return -1
+                elif keys[a] == _missing_key:
+                    return 1
+                elif (keys[a] < keys[b]) == (order == Qt.AscendingOrder):
+                    return -1
+                else:
+                    return 1
+        return 0
+
+    def append_rows(self, rows):
+        """Add rows to the end of the data. If the model is sorted, the
+        new rows are merged into place instead of sorting everything
+        again.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+
+        start = len(self.source)
+        self.source.extend(rows)
+
+        for column, keys in list(self.sort_keys.items()):
+            new_keys = _sort_keys([_column_value(x, column) for x in rows])
+            if type(new_keys) is type(keys):
+                keys.extend(new_keys)
+            else:
+                del self.sort_keys[column]
+
+        num_columns = max(self.num_columns, _count_columns(rows))
+        if num_columns > self.num_columns:
+            self.beginInsertColumns(QModelIndex(), self.num_columns,
+                                    num_columns - 1)
+            self.num_columns = num_columns
+            self.endInsertColumns()
+
+        root = self.root_item
+
+        if self.permutation is None:
+            self.beginInsertRows(QModelIndex(), start, len(self.source) - 1)
+            root.setChildren(list(root.children) + rows)
+            self.endInsertRows()
+            return
+
+        new_source_rows = self._sort_rows(
+            list(range(start, len(self.source))), self.sort_order)
+
+        # Find where each new row goes among the existing ones. That's
+        # after any rows that compare equal, to keep the sort stable,
+        # and never before the previous new row, since they're sorted.
+        old_permutation = self.permutation
+        positions = []
+        low = 0
+        for source_row in new_source_rows:
+            high = len(old_permutation)
+            while low < high:
+                middle = (low + high) // 2
+                if self._compare_rows(source_row,
+                                      old_permutation[middle]) < 0:
+                    high = middle
+                else:
+                    low = middle + 1
+            positions.append(low)
+
+        # Then merge the two in one pass.
+        old_children = root.children
+        permutation = []
+        children = []
+        new_rows = []
+        previous = 0
+        for count, (position, source_row) in enumerate(
+                zip(positions, new_source_rows)):
+            permutation.extend(old_permutation[previous:position])
+            children.extend(old_children[previous:position])
+            new_rows.extend(range(previous + count, position + count))
+            permutation.append(source_row)
+            children.append(self.source[source_row])
+            previous = position
+        permutation.extend(old_permutation[previous:])
+        children.extend(old_children[previous:])
+        new_rows.extend(range(previous + len(positions),
+                              len(old_permutation) + len(positions)))
+
+        self._rearrange(children, permutation, new_rows)
+
+    def update_data(self, data, num_columns=None):
+        """Replace the data shown by the model. Qt is only told about the
+        rows that have actually changed, so views keep their expansion
+        and selection state for everything else.
+
+        :param num_columns:  The number of columns the data needs, if
+                             it has already been worked out, for
+                             example on a background thread.
+        """
+        self.source = list(data)
+        self.sort_keys = {}
+        self.permutation = None
+
+        if self.sort_order:
+            self.permutation = self._sort_permutation(self.sort_order)
+            data = [self.source[x] for x in self.permutation]
+
+        if num_columns is None:
+            num_columns = _count_columns(data)
+
+        if num_columns != self.num_columns:
+            # Every row is affected by a change in the number of
+            # columns, so there's nothing to be gained by diffing.
+            self.beginResetModel()
+            self.root_item = ListProxy([], data)
+            self.num_columns = num_columns
+            self.endResetModel()
+        else:
+            # Drop the registry entries for the old containers, so that
+            # repeated updates don't keep them all alive.
+            self.root_item.states.clear()
+            self._update_children(QModelIndex(), self.root_item, data)
+
+    def _update_children(self, parent_index, proxy, children):
+        rows = list(proxy.children)
+        proxy.setChildren(rows)
+        last_column = self.num_columns - 1
+
+        for row in range(min(len(rows), len(children))):
+            if rows[row] == children[row]:
+                continue
+
+            child = proxy.child_cache.get(row)
+            display_items, child_list = _split_row(children[row])
+
+            if child is None:
+                # Qt has never asked about this row, so just swap it.
+                rows[row] = children[row]
+            elif (type(child) is ListProxy and child_list is not None and
+                  proxy.findAncestor(child_list) is None):
+                rows[row] = children[row]
+                child.data = display_items
+                child_index = self.index(row, 0, parent_index)
+                self.dataChanged.emit(
+                    child_index, self.index(row, last_column, parent_index))
+                self._update_children(child_index, child, child_list)
+            elif type(child) is LeafProxy and child_list is None:
+                rows[row] = children[row]
+                child.data = child.key = child.click_target = children[row]
+                self.dataChanged.emit(
+                    self.index(row, 0, parent_index),
+                    self.index(row, last_column, parent_index))
+            else:
+                # The row has changed between having children and not,
+                # so the proxy itself has to be replaced.
+                self.beginRemoveRows(parent_index, row, row)
+                proxy.removeChild(row)
+                self.endRemoveRows()
+                self.beginInsertRows(parent_index, row, row)
+                proxy.insertChild(row, children[row])
+                self.endInsertRows()
+
+        if len(children) > len(rows):
+            self.beginInsertRows(parent_index, len(rows), len(children) - 1)
+            rows.extend(children[len(rows):])
+            self.endInsertRows()
+        elif len(children) < len(rows):
+            self.beginRemoveRows(parent_index, len(children), len(rows) - 1)
+            for row in reversed(range(len(children), len(rows))):
+                proxy.removeChild(row)
+            self.endRemoveRows()
+
+
+class SelectedRows(object):
+    """A read-only sequence of the data behind a set of selected rows.
+
+    This is built from the ranges in a selection rather than from the
+    individual indexes, and the data for a row is only looked up when
+    it's asked for, so it's cheap even for very large selections.
+
+    """
+
+    def __init__(self, spans):
+        """
+        :param spans:  A list of (parent proxy, first row, last row)
+                       tuples, which mustn't overlap.
+        """
+        self.spans = spans
+
+        self._starts = []
+        total = 0
+        for _, first, last in spans:
+            self._starts.append(total)
+            total += last - first + 1
+        self._length = total
+
+    @classmethod
+    def fromSelection(cls, selection, root_item):
+        """Make the rows for a QItemSelection. Ranges covering the same
+        rows in different columns are merged, so each row appears once.
+        """
+        intervals = OrderedDict()
+        for selection_range in selection:
+            parent_index = selection_range.parent()
+            if parent_index.isValid():
+                parent = parent_index.internalPointer()
+            else:
+                parent = root_item
+            intervals.setdefault(id(parent), (parent, []))[1].append(
+                (selection_range.top(), selection_range.bottom()))
+
+        spans = []
+        for parent, rows in intervals.values():
+            rows.sort()
+            first, last = rows[0]
+            for top, bottom in rows[1:]:
+                if top > last + 1:
+                    spans.append((parent, first, last))
+                    first = top
+                last = max(last, bottom)
+            spans.append((parent, first, last))
+
+        return cls(spans)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Selected row index out of range")
+
+        span = bisect.bisect_right(self._starts, index) - 1
+        parent, first, _ = self.spans[span]
+        return parent.childAt(first + index - self._starts[span]).data
+
+    def __iter__(self):
+        for parent, first, last in self.spans:
+            for row in range(first, last + 1):
+                yield parent.childAt(row).data
+
+    def ranges(self):
+        """The selection as a list of (container, first row, last row)
+        tuples, where the container is the dict or list holding the
+        rows. For list data, the rows themselves can be had by slicing
+        the container.
+        """
+        return [(parent.children, first, last)
+                for parent, first, last in self.spans]
+
+
+class GenericTreeView(object):
+    """The behaviour shared by the wrappers around a QTreeView."""
+
+    _selection_callback = None
 
     def set_on_clicked(self, callback):
         def execute(index):
@@ -233,8 +1156,97 @@ class DictTreeView(object):
 
         self.treeView.clicked.connect(execute)
 
+    def set_multi_selection(self, enabled=True):
+        """Allow several rows to be selected at once, with shift and
+        control clicks.
+        """
+        if enabled:
+            self.treeView.setSelectionMode(
+                QAbstractItemView.ExtendedSelection)
+        else:
+            self.treeView.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.treeView.setSelectionBehavior(QAbstractItemView.SelectRows)
+
+    def selected_rows(self):
+        """The data for the currently selected rows, as a
+        `SelectedRows`.
+        """
+        return SelectedRows.fromSelection(
+            self.treeView.selectionModel().selection(),
+            self.treeView.model().root_item)
+
+    def set_on_selection_changed(self, callback):
+        """Call `callback(selected, deselected)` when the selection
+        changes, where each argument is a `SelectedRows` holding just
+        the rows that were added to or removed from the selection.
+        """
+        self._selection_callback = callback
+        self._connect_selection_callback()
+
+    def _connect_selection_callback(self):
+        # Setting a new model replaces the selection model, so this
+        # has to be done again whenever that happens.
+        if self._selection_callback is None:
+            return
 
-class NestedListTreeView(object):
+        callback = self._selection_callback
+
+        def execute(selected, deselected):
+            root_item = self.treeView.model().root_item
+            callback(SelectedRows.fromSelection(selected, root_item),
+                     SelectedRows.fromSelection(deselected, root_item))
+
+        self.treeView.selectionModel().selectionChanged.connect(execute)
+
+
+class InspectorModel(GenericModel):
+    """A model for browsing any Python object, without copying it into
+    dicts or lists first. See `ObjectProxy`.
+
+    """
+
+    def __init__(self, obj, header=None, chunk_size=1000, max_depth=None,
+                 repr_length=200):
+        """
+        :param repr_length:  The longest text to show for a value.
+        """
+        if header is None:
+            header = ["Name", "Type", "Value"]
+
+        super(InspectorModel, self).__init__(header)
+
+        repr_limits = _LimitedRepr()
+        repr_limits.maxlevel = 2
+        repr_limits.maxstring = repr_length
+        repr_limits.maxother = repr_length
+
+        self.root_item = ObjectProxy(None, obj, chunk_size=chunk_size,
+                                     max_depth=max_depth,
+                                     repr_limits=repr_limits)
+
+    def columnCount(self, parent):
+        return 3
+
+    def hasChildren(self, parent_index):
+        # Qt asks this for every visible node to decide whether to draw
+        # an expander, so it mustn't go as far as counting the rows.
+        if parent_index.column() > 0:
+            return False
+
+        if not parent_index.isValid():
+            return self.root_item.mayHaveChildren()
+        else:
+            return parent_index.internalPointer().mayHaveChildren()
+
+
+class DictTreeView(GenericTreeView):
+    def __init__(self, data):
+        self.data = data
+        self.treeView = QTreeView()
+        self.treeView.setModel(DictModel(self.data))
+
+
+class NestedListTreeView(GenericTreeView):
     def __init__(self, data, header=None):
         self.treeView = QTreeView()
         self.header = header
@@ -254,16 +1266,11 @@ class NestedListTreeView(object):
         for i in range(self.model.columnCount(None)):
             self.treeView.resizeColumnToContents(i)
 
-    def set_on_clicked(self, callback):
-        def execute(index):
-            callback(index.internalPointer().data)
-
-        self.treeView.clicked.connect(execute)
-
     def set_data(self, data):
         self.data = data
         self.model = ListModel(self.data, header=self.header)
         self.treeView.setModel(self.model)
+        self._connect_selection_callback()
 
     def refresh_data(self):
         """Refresh the UI's view of all data in the tree view.  This may be
@@ -274,6 +1281,13 @@ class NestedListTreeView(object):
         self.treeView.dataChanged(root_index, root_index)
 
 
+class InspectorTreeView(GenericTreeView):
+    def __init__(self, obj, max_depth=None):
+        self.data = obj
+        self.treeView = QTreeView()
+        self.treeView.setModel(InspectorModel(obj, max_depth=max_depth))
+
+
 class LinearLayoutWidget(QWidget):
     def __init__(self, widgets, parent=None):
         super(LinearLayoutWidget, self).__init__(parent)
@@ -324,8 +1338,191 @@ class MainWindow(QMainWindow):
         self.menus['&File'].addAction(self.exit_action)
 
 
+def _trigrams(text):
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+
+class ChoiceIndex(object):
+    """An index over a large set of strings, for completing text as it's
+    typed. Matching ignores case.
+
+    Choices that start with the text come first, then ones that
+    contain it, then ones that contain all of its three-letter
+    sequences in some other arrangement. Within each group, choices
+    are in alphabetical order. To keep lookups quick, at most
+    `scan_limit` choices are examined for the last two groups.
+
+    The index has to be built before it can be used, which can take a
+    while for a large set of choices, so `build_in_background` does it
+    on a separate thread. Lookups return nothing until it's ready.
+
+    """
+
+    scan_limit = 20000
+
+    def __init__(self, choices):
+        self.choices = [x if isinstance(x, _string_types) else str(x)
+                        for x in choices]
+        self.ready = False
+        self._thread = None
+        self._last_query = None
+        self._last_candidates = None
+
+    def build(self):
+        lowered = [x.lower() for x in self.choices]
+
+        order = sorted(range(len(lowered)), key=lowered.__getitem__)
+        sorted_keys = [lowered[i] for i in order]
+
+        trigrams = {}
+        for i, text in enumerate(lowered):
+            for trigram in _trigrams(text):
+                trigrams.setdefault(trigram, []).append(i)
+
+        # The posting lists are built in order, so they're already
+        # sorted, and arrays are far more compact than lists.
+        for trigram, rows in trigrams.items():
+            trigrams[trigram] = array('i', rows)
+
+        self._lowered = lowered
+        self._order = order
+        self._sorted_keys = sorted_keys
+        self._trigrams = trigrams
+        self.ready = True
+
+    def build_in_background(self):
+        """Start building the index on another thread, unless that's
+        already happened.
+        """
+        if self.ready or self._thread is not None:
+            return
+
+        self._thread = threading.Thread(target=self.build)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _prefix_matches(self, query, limit):
+        start = bisect.bisect_left(self._sorted_keys, query)
+        stop = min(start + limit, len(self._sorted_keys))
+        return [self._order[position]
+                for position in range(start, stop)
+                if self._sorted_keys[position].startswith(query)]
+
+    def _candidates(self, query):
+        """Find the rows containing all the trigrams of the query. When
+        the query extends the previous one, the previous candidates
+        are filtered rather than starting again.
+
+        Returns the rows and whether they're complete, which they
+        won't be if more than `scan_limit` rows had to be examined.
+        """
+        trigrams = _trigrams(query)
+
+        if (self._last_query is not None and
+                query.startswith(self._last_query)):
+            rows = self._last_candidates
+            trigrams -= _trigrams(self._last_query)
+        else:
+            if not all(x in self._trigrams for x in trigrams):
+                return [], True
+            # Start from the rarest trigram, so there's least to filter.
+            rarest = min(trigrams, key=lambda x: len(self._trigrams[x]))
+            rows = self._trigrams[rarest]
+            trigrams.discard(rarest)
+
+        # Checking the strings themselves is quicker than searching
+        # the other posting lists.
+        lowered = self._lowered
+        candidates = [x for x in itertools.islice(rows, self.scan_limit)
+                      if all(y in lowered[x] for y in trigrams)]
+        return candidates, len(rows) <= self.scan_limit
+
+    def lookup(self, text, limit=20):
+        """Find the best `limit` choices for `text`."""
+        if not self.ready:
+            return []
+
+        query = text.lower()
+        if not query:
+            return []
+
+        # The sorted keys give the prefix matches almost for free, and
+        # they come first anyway, so often that's all that's needed.
+        results = self._prefix_matches(query, limit)
+        if len(results) >= limit or len(query) < 3:
+            self._last_query = None
+            return [self.choices[x] for x in results]
+
+        candidates, complete = self._candidates(query)
+        if complete:
+            self._last_query = query
+            self._last_candidates = candidates
+        else:
+            self._last_query = None
+
+        lowered = self._lowered
+        prefix_matches = set(results)
+
+        def rank(row):
+            return (query not in lowered[row], lowered[row])
+
+        results.extend(heapq.nsmallest(
+            limit - len(results),
+            (x for x in candidates if x not in prefix_matches),
+            key=rank))
+        return [self.choices[x] for x in results]
+
+
+class ChoiceLineEdit(QLineEdit):
+    """A QLineEdit that offers completions from a `ChoiceIndex`.
+
+    The completions are only looked up once typing has paused for
+    `delay` milliseconds, and at most `limit` of them are shown.
+    """
+
+    def __init__(self, index, parent=None, limit=20, delay=150):
+        super(ChoiceLineEdit, self).__init__(parent)
+
+        self.index = index
+        self.limit = limit
+        index.build_in_background()
+
+        self.completions = QStringListModel(self)
+        self.completer = QCompleter(self.completions, self)
+        # The index has already done the filtering.
+        self.completer.setCompletionMode(
+            QCompleter.UnfilteredPopupCompletion)
+        self.setCompleter(self.completer)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.update_completions)
+
+        self.textEdited.connect(self.text_edited)
+
+    def text_edited(self, text):
+        self.timer.start()
+
+    def update_completions(self):
+        if not self.index.ready:
+            # Try again once the index has had a chance to finish.
+            self.timer.start()
+            return
+
+        completions = self.index.lookup(self.text(), self.limit)
+        self.completions.setStringList(completions)
+        if completions:
+            self.completer.complete()
+
+
 class FormWidget(QWidget):
     def __init__(self, parent=None, submit_callback=None, inputs=None):
+        """
+        :param inputs:  The names of the inputs. If this is a dict,
+                        any input whose value is a `ChoiceIndex`
+                        offers completions from it.
+        """
         super(FormWidget, self).__init__(parent)
 
         if inputs is None:
@@ -337,7 +1534,11 @@ class FormWidget(QWidget):
 
         self.inputs = {}
         for key in inputs:
-            self.inputs[key] = QLineEdit()
+            choices = inputs[key] if isinstance(inputs, dict) else None
+            if isinstance(choices, ChoiceIndex):
+                self.inputs[key] = ChoiceLineEdit(choices)
+            else:
+                self.inputs[key] = QLineEdit()
             self.form.addRow(QLabel(key), self.inputs[key])
 
         self.submitButton = QPushButton("Submit")
@@ -355,16 +1556,159 @@ class FormWidget(QWidget):
 
 
 class Grid(object):
-    def __init__(self, data):
+    def __init__(self, data, header=None, sortable=False):
+        """
+        :param sortable:  Whether clicking on a column header sorts by
+                          that column.
+        """
         self.data = data
+        self.header = header
+        self.sortable = sortable
 
     def create_widget(self, parent=None):
         self.tree_view = QTreeView(parent)
-        self.model = ListModel(self.data)
+        self.model = ListModel(self.data, header=self.header)
         self.tree_view.setModel(self.model)
+        if self.sortable:
+            # Enabling sorting sorts straight away by the header's sort
+            # indicator, which would otherwise reverse the rows by the
+            # first column. With no indicator the original order is kept.
+            self.tree_view.header().setSortIndicator(-1, Qt.AscendingOrder)
+            self.tree_view.setSortingEnabled(True)
         return self.tree_view
 
 
+def _fingerprint(data):
+    return hashlib.md5(repr(data).encode('utf-8')).digest()
+
+
+class _Poller(QObject):
+    """Calls a producer on a background thread and applies the result
+    to a ListModel back on the GUI thread. Only one call is in flight
+    at a time, and the next one is scheduled once the previous result
+    has been dealt with.
+
+    Everything that can be worked out from the data alone, such as its
+    fingerprint, is done on the background thread. When the data hasn't
+    changed, the GUI thread only has to schedule the next poll.
+    """
+
+    produced = Signal(object, object, int, float)
+    unchanged = Signal(float)
+
+    def __init__(self, producer, model, interval, max_interval, parent=None):
+        super(_Poller, self).__init__(parent)
+
+        self.producer = producer
+        self.model = model
+        self.interval = interval
+        self.max_interval = max_interval
+        self.fingerprint = None
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.poll)
+
+        # The signals are emitted from the worker thread, so these are
+        # queued connections and the slots run on the GUI thread.
+        self.produced.connect(self.apply)
+        self.unchanged.connect(self.reschedule)
+
+    def start(self):
+        self.timer.start(0)
+
+    def stop(self):
+        self.timer.stop()
+
+    def poll(self):
+        thread = threading.Thread(target=self._produce)
+        thread.daemon = True
+        thread.start()
+
+    def _produce(self):
+        start = default_timer()
+        try:
+            data = self.producer()
+            # It's safe to read self.fingerprint here, because it's only
+            # set by apply(), which finishes before the next poll starts.
+            fingerprint = _fingerprint(data)
+            changed = fingerprint != self.fingerprint
+            if changed:
+                num_columns = _count_columns(data)
+        except Exception:
+            traceback.print_exc()
+            changed = False
+
+        elapsed = default_timer() - start
+        try:
+            if changed:
+                self.produced.emit(data, fingerprint, num_columns, elapsed)
+            else:
+                self.unchanged.emit(elapsed)
+        except RuntimeError:
+            # The widget has been destroyed while we were working.
+            pass
+
+    @Slot(object, object, int, float)
+    def apply(self, data, fingerprint, num_columns, elapsed):
+        start = default_timer()
+
+        # If the update fails, polling carries on, and as the fingerprint
+        # is only recorded once it succeeds, the next poll tries again.
+        try:
+            self.model.update_data(data, num_columns)
+            self.fingerprint = fingerprint
+        finally:
+            self.reschedule(elapsed + default_timer() - start)
+
+    @Slot(float)
+    def reschedule(self, elapsed):
+        self.timer.start(self.next_delay(elapsed * 1000))
+
+    def next_delay(self, elapsed_ms):
+        """The time to wait before polling again. If the last update took
+        longer than the interval, back off so that polling can't
+        swamp the GUI.
+        """
+        if elapsed_ms > self.interval:
+            return int(min(2 * elapsed_ms, self.max_interval))
+        else:
+            return self.interval
+
+
+class PollingGrid(Grid):
+    """A Grid that keeps itself up to date with the result of calling
+    `producer` every `interval` milliseconds.
+
+    The producer is called on a background thread, so it mustn't touch
+    the UI. If its result is the same as last time nothing happens,
+    otherwise only the rows that differ are updated.
+    """
+
+    def __init__(self, producer, interval=1000, header=None,
+                 max_interval=None, sortable=False):
+        """
+        :param max_interval:  The longest time in milliseconds to back
+                              off to when updates are slow. Defaults
+                              to 32 times the interval.
+        """
+        super(PollingGrid, self).__init__([], header, sortable)
+
+        self.producer = producer
+        self.interval = interval
+        if max_interval is None:
+            max_interval = interval * 32
+        self.max_interval = max_interval
+
+    def create_widget(self, parent=None):
+        widget = super(PollingGrid, self).create_widget(parent)
+
+        self.poller = _Poller(self.producer, self.model,
+                              self.interval, self.max_interval, widget)
+        self.poller.start()
+        return widget
+
+
 class TextEdit(object):
     """Proxy class for creating a QLineEdit. This has to be a distinct
     class for two reasons:
@@ -377,11 +1721,21 @@ class TextEdit(object):
       instances to be created when the MainWindow is created.
     """
 
-    def __init__(self, name):
+    def __init__(self, name, choices=None):
+        """
+        :param choices:  A `ChoiceIndex`, or a list of strings, to offer
+                         completions from.
+        """
         self.name = name
+        if choices is not None and not isinstance(choices, ChoiceIndex):
+            choices = ChoiceIndex(choices)
+        self.choices = choices
 
     def create_widget(self, parent=None):
-        return QLineEdit(parent)
+        if self.choices is not None:
+            return ChoiceLineEdit(self.choices, parent)
+        else:
+            return QLineEdit(parent)
 
 
 class Button(object):
@@ -0,0 +1,299 @@
+"""Headless benchmark for the cost of painting whole TrivialUI windows.
+
+Each window is described by a spec, which says which widgets go in the
+`widgets` list of a MainWindow and what to do to it once it's shown:
+
+    {"name": "grid-10k",
+     "size": [800, 600],
+     "widgets": [{"type": "Grid", "rows": 10000, "columns": 5},
+                 {"type": "Button", "label": "Go"},
+                 {"type": "TextEdit"}],
+     "script": [{"action": "expand", "row": 0},
+                {"action": "scroll", "by": 50, "repeat": 20},
+                {"action": "resize", "width": 1200, "height": 900}]}
+
+Each step of the script is followed by a frame, which is timed along
+with the number of calls to the models' data() that it made. The time
+from starting to create the window to the end of its first frame is
+recorded too. The results are written out as JSON, and can be checked
+against an earlier report with --baseline.
+
+Qt is asked for its offscreen platform plugin, so no display is
+needed. That plugin only exists in Qt 5 and later; with Qt 4 a display
+is still required (xvfb-run will do).
+
+Run it from the top of the repository:
+
+    python benchmarks/window_paint.py --output report.json
+
+"""
+
+import os
+import sys
+
+# This has to be set before Qt is loaded.
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+from PySide.QtCore import QModelIndex  # noqa: E402
+from PySide.QtGui import QApplication, QImage  # noqa: E402
+from timeit import default_timer  # noqa: E402
+import argparse  # noqa: E402
+import contextlib  # noqa: E402
+import json  # noqa: E402
+import platform  # noqa: E402
+
+import TrivialUI  # noqa: E402
+
+
+DEFAULT_SPECS = [
+    {"name": "grid-10k",
+     "size": [800, 600],
+     "widgets": [{"type": "Grid", "rows": 10000, "columns": 5},
+                 {"type": "Button", "label": "Go"},
+                 {"type": "TextEdit"}],
+     "script": [{"action": "scroll", "by": 40, "repeat": 25},
+                {"action": "resize", "width": 1200, "height": 900},
+                {"action": "scroll", "by": -40, "repeat": 25}]},
+    {"name": "tree-1k-nested",
+     "size": [800, 600],
+     "widgets": [{"type": "Grid", "rows": 1000, "columns": 4,
+                  "children": 50}],
+     "script": [{"action": "expand", "row": 0},
+                {"action": "expand", "row": 1},
+                {"action": "scroll", "by": 20, "repeat": 10},
+                {"action": "expand_all"},
+                {"action": "scroll", "by": 200, "repeat": 10}]},
+    {"name": "grid-100k-sortable",
+     "size": [1024, 768],
+     "widgets": [{"type": "Grid", "rows": 100000, "columns": 8,
+                  "sortable": True},
+                 {"type": "TextEdit"},
+                 {"type": "Button", "label": "Refresh"}],
+     "script": [{"action": "scroll", "by": 1000, "repeat": 20},
+                {"action": "resize", "width": 640, "height": 480},
+                {"action": "resize", "width": 1600, "height": 1200}]},
+]
+
+
+def make_rows(rows, columns, children=0):
+    """Make some list data for a Grid, with `children` nested rows under
+    each top-level row.
+    """
+    def make_row(name, i):
+        return (name,) + tuple(i * column for column in range(1, columns))
+
+    data = []
+    for i in range(rows):
+        row = make_row("row %d" % i, i)
+        if children:
+            row += ([make_row("child %d.%d" % (i, j), j)
+                     for j in range(children)],)
+        data.append(row)
+    return data
+
+
+def make_widget(spec):
+    kind = spec["type"]
+    if kind == "Grid":
+        data = make_rows(spec.get("rows", 1000), spec.get("columns", 4),
+                         spec.get("children", 0))
+        return TrivialUI.Grid(data, header=spec.get("header"),
+                              sortable=spec.get("sortable", False))
+    elif kind == "Button":
+        return TrivialUI.Button(spec.get("label", "Button"),
+                                on_click=lambda *args: None)
+    elif kind == "TextEdit":
+        return TrivialUI.TextEdit(spec.get("name", "text"))
+    else:
+        raise ValueError("Unknown widget type %r" % kind)
+
+
+class DataCallCounter(object):
+    """Counts the calls to data() on every TrivialUI model."""
+
+    def __init__(self):
+        self.count = 0
+
+    @contextlib.contextmanager
+    def installed(self):
+        original = TrivialUI.GenericModel.data
+
+        def data(model, index, role):
+            self.count += 1
+            return original(model, index, role)
+
+        TrivialUI.GenericModel.data = data
+        try:
+            yield self
+        finally:
+            TrivialUI.GenericModel.data = original
+
+
+def paint(app, window):
+    """Paint the whole window, as if it were being shown for real, and
+    return the time it took in milliseconds.
+    """
+    start = default_timer()
+    app.processEvents()
+    image = QImage(window.size(), QImage.Format_ARGB32)
+    window.render(image)
+    return (default_timer() - start) * 1000
+
+
+def run_action(window, grids, step):
+    action = step["action"]
+    tree_view = grids[step.get("grid", 0)].tree_view if grids else None
+
+    if action == "resize":
+        window.resize(step["width"], step["height"])
+    elif action == "scroll":
+        scroll_bar = tree_view.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.value() + step["by"])
+    elif action == "expand":
+        tree_view.expand(tree_view.model().index(step["row"], 0,
+                                                 QModelIndex()))
+    elif action == "expand_all":
+        tree_view.expandAll()
+    elif action == "collapse_all":
+        tree_view.collapseAll()
+    elif action == "paint":
+        pass
+    else:
+        raise ValueError("Unknown action %r" % action)
+
+
+def summarise(times):
+    if not times:
+        return {}
+
+    ordered = sorted(times)
+    return {"frames": len(times),
+            "mean_ms": sum(times) / len(times),
+            "median_ms": ordered[len(ordered) // 2],
+            "p95_ms": ordered[min(len(ordered) - 1,
+                                  int(len(ordered) * 0.95))],
+            "max_ms": ordered[-1]}
+
+
+def run_spec(app, spec):
+    widgets = [make_widget(x) for x in spec["widgets"]]
+    grids = [x for x in widgets if isinstance(x, TrivialUI.Grid)]
+    window_class = type(str(spec["name"]), (TrivialUI.MainWindow,),
+                        {"widgets": widgets})
+
+    counter = DataCallCounter()
+    with counter.installed():
+        start = default_timer()
+        window = window_class(title=spec["name"])
+        window.resize(*spec.get("size", [800, 600]))
+        window.show()
+        paint(app, window)
+        first_paint_ms = (default_timer() - start) * 1000
+        first_paint_calls = counter.count
+
+        frames = []
+        for step in spec.get("script", []):
+            for _ in range(step.get("repeat", 1)):
+                counter.count = 0
+                run_action(window, grids, step)
+                frames.append({"action": step["action"],
+                               "ms": paint(app, window),
+                               "data_calls": counter.count})
+
+        window.close()
+
+    summary = summarise([x["ms"] for x in frames])
+    if frames:
+        summary["data_calls_per_frame"] = (
+            sum(x["data_calls"] for x in frames) / float(len(frames)))
+
+    return {"name": spec["name"],
+            "startup_to_first_paint_ms": first_paint_ms,
+            "first_paint_data_calls": first_paint_calls,
+            "frames": frames,
+            "summary": summary}
+
+
+def compare(report, baseline, tolerance):
+    """Find the windows that have got slower than the baseline by more
+    than `tolerance`, as a fraction.
+    """
+    old_windows = {x["name"]: x for x in baseline["windows"]}
+    regressions = []
+
+    for window in report["windows"]:
+        old = old_windows.get(window["name"])
+        if old is None:
+            continue
+
+        for key, new_value, old_value in [
+                ("startup_to_first_paint_ms",
+                 window["startup_to_first_paint_ms"],
+                 old["startup_to_first_paint_ms"]),
+                ("mean_ms",
+                 window["summary"].get("mean_ms"),
+                 old["summary"].get("mean_ms")),
+                ("data_calls_per_frame",
+                 window["summary"].get("data_calls_per_frame"),
+                 old["summary"].get("data_calls_per_frame"))]:
+            if new_value is None or not old_value:
+                continue
+            if new_value > old_value * (1 + tolerance):
+                regressions.append({"window": window["name"],
+                                    "metric": key,
+                                    "baseline": old_value,
+                                    "current": new_value})
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--spec",
+                        help="JSON file with a list of window specs, "
+                             "instead of the built-in ones")
+    parser.add_argument("--output",
+                        help="File to write the JSON report to, "
+                             "instead of stdout")
+    parser.add_argument("--baseline",
+                        help="An earlier report to check for regressions "
+                             "against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="How much slower than the baseline is "
+                             "allowed, as a fraction (default 0.2)")
+    args = parser.parse_args(argv)
+
+    if args.spec:
+        with open(args.spec) as f:
+            specs = json.load(f)
+    else:
+        specs = DEFAULT_SPECS
+
+    app = QApplication([])
+
+    report = {"python": platform.python_version(),
+              "platform": os.environ.get("QT_QPA_PLATFORM"),
+              "windows": [run_spec(app, x) for x in specs]}
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(report, json.load(f),
+                                            args.tolerance)
+        if report["regressions"]:
+            status = 1
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
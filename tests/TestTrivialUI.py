@@ -1,8 +1,12 @@
-from PySide import QtCore
+from PySide import QtCore, QtGui
+from collections import OrderedDict, namedtuple
 import pytest
 import unittest
 
-from TrivialUI import DictModel, ListModel, DictProxy, ListProxy, LeafProxy
+from TrivialUI import (DictModel, ListModel, DictProxy, ListProxy, LeafProxy,
+                       BackReferenceProxy, SelectedRows, InspectorModel,
+                       ChoiceIndex, NestedListTreeView, _Poller,
+                       _fingerprint)
 
 def satisfies_QAbstractItemModel(thing):
     assert hasattr(thing, "index")
@@ -11,6 +15,21 @@ def satisfies_QAbstractItemModel(thing):
     assert hasattr(thing, "columnCount")
     assert hasattr(thing, "data")
 
+def check_persistent_indexes(test, model, persistent):
+    """Check that each persistent index that's still valid refers to a
+    proxy that's still in the tree, at the row Qt thinks it's at.
+    """
+    for index in persistent:
+        if not index.isValid():
+            continue
+
+        proxy = index.internalPointer()
+        test.assertIs(proxy, model.index(index.row(), index.column(),
+                                         index.parent()).internalPointer())
+        while proxy is not model.root_item:
+            test.assertIs(proxy, proxy.parent.child_cache.get(proxy.row))
+            proxy = proxy.parent
+
 class TestDictProxy(unittest.TestCase):
     def test_dictProxy(self):
         proxy = DictProxy('key', {'a': 1, 'b': 2})
@@ -28,6 +47,51 @@ class TestDictProxy(unittest.TestCase):
                               for i in range(2)]))
         self.assertEqual(proxy, proxy.childAt(0).parent)
 
+    def test_shared_subtree(self):
+        shared = {'one': 1}
+        proxy = DictProxy('key', {'a': shared, 'b': shared})
+
+        first, second = proxy.childAt(0), proxy.childAt(1)
+
+        self.assertIsNot(first, second)
+        self.assertIs(first.shared, second.shared)
+
+    def test_states_scale_with_containers(self):
+        shared = {'k%d' % i: i for i in range(50)}
+        proxy = DictProxy(None, {'p%d' % i: {'x': shared}
+                                 for i in range(200)})
+
+        for i in range(200):
+            inner = proxy.childAt(i).childAt(0)
+            for j in range(inner.childCount()):
+                inner.childAt(j)
+
+        # The root, the 200 distinct outer dicts and the one shared dict.
+        self.assertEqual(202, len(proxy.states))
+
+    def test_dict_grows(self):
+        the_dict = OrderedDict([('a', 1)])
+        proxy = DictProxy(None, the_dict)
+        proxy.childAt(0)
+
+        the_dict['b'] = 2
+
+        self.assertEqual(2, proxy.childCount())
+        self.assertEqual('b', proxy.childAt(1).key)
+
+    def test_cycle(self):
+        the_dict = {'a': 1}
+        the_dict['self'] = the_dict
+        proxy = DictProxy(None, the_dict)
+
+        children = [proxy.childAt(i) for i in range(2)]
+        back_refs = [x for x in children
+                     if isinstance(x, BackReferenceProxy)]
+
+        self.assertEqual(1, len(back_refs))
+        self.assertIs(proxy, back_refs[0].target)
+        self.assertEqual(0, back_refs[0].childCount())
+
 
 class TestDictModel(unittest.TestCase):
     def test_create(self):
@@ -60,3 +124,479 @@ class TestListModel(unittest.TestCase):
 
         first_child_index = model.index(0, 0, root_index)
         self.assertEquals(0, model.rowCount(first_child_index))
+
+    def test_create_is_lazy(self):
+        shared = [('one', 1, 2)]
+        model = ListModel([('row', None, shared) for _ in range(1000)])
+
+        self.assertEqual(3, model.columnCount(None))
+        self.assertEqual({}, model.root_item.child_cache)
+        self.assertEqual({}, model.root_item.states)
+
+    def test_data_follows_edits(self):
+        the_list = [['a', 1]]
+        model = ListModel(the_list)
+        index = model.index(0, 1, QtCore.QModelIndex())
+
+        self.assertEqual('1', model.data(index, QtCore.Qt.DisplayRole))
+        the_list[0][1] = 99
+        self.assertEqual('99', model.data(index, QtCore.Qt.DisplayRole))
+
+    def test_cycle(self):
+        the_list = [('first', None, [])]
+        the_list[0][2].append(('loop', the_list))
+
+        model = ListModel(the_list)
+
+        branch = model.root_item.childAt(0)
+        self.assertIsInstance(branch, ListProxy)
+        self.assertIsInstance(branch.childAt(0), BackReferenceProxy)
+
+    def test_update_data(self):
+        the_list = [('first', None, [('one', 1), ('two', 2)]),
+                    ('second', None, [('une', 1), ('deux', 2)])]
+
+        model = ListModel(the_list)
+        root_index = model.index(0, 0, QtCore.QModelIndex())
+        first = root_index.internalPointer()
+        one = model.index(0, 0, root_index).internalPointer()
+
+        model.update_data([('first', None, [('one', 3), ('two', 2)]),
+                           ('second', None, [('une', 1), ('deux', 2)]),
+                           ('third', None, [])])
+
+        self.assertEqual(3, model.rowCount(QtCore.QModelIndex()))
+        # The proxies for unchanged rows are kept, so views don't lose
+        # track of them.
+        self.assertIs(first, model.root_item.childAt(0))
+        self.assertIs(one, first.childAt(0))
+        self.assertEqual(('one', 3), one.data)
+        self.assertEqual('3', model.data(model.index(0, 1, root_index),
+                                         QtCore.Qt.DisplayRole))
+
+    def test_update_data_removes_rows(self):
+        model = ListModel([('a', 1, [('x', 1)]), ('b', 2, [('z', 1)])])
+        a = model.index(0, 0, QtCore.QModelIndex())
+        b = model.index(1, 0, QtCore.QModelIndex())
+        persistent = [QtCore.QPersistentModelIndex(x)
+                      for x in [a, model.index(0, 0, a),
+                                b, model.index(0, 0, b)]]
+
+        self.assertFalse(model.parent(a).isValid())
+
+        model.update_data([('a', 1, [('x', 1)])])
+
+        self.assertEqual([True, True, False, False],
+                         [x.isValid() for x in persistent])
+        check_persistent_indexes(self, model, persistent)
+
+    def test_update_data_leaf_to_branch(self):
+        model = ListModel([('a', 1), ('b', 2)])
+        persistent = [QtCore.QPersistentModelIndex(
+            model.index(row, 0, QtCore.QModelIndex())) for row in range(2)]
+
+        model.update_data([('a', None, [('x', 1)]), ('b', 2)])
+
+        self.assertEqual([False, True], [x.isValid() for x in persistent])
+        check_persistent_indexes(self, model, persistent)
+
+        a = model.index(0, 0, QtCore.QModelIndex())
+        persistent = [QtCore.QPersistentModelIndex(x)
+                      for x in [a, model.index(0, 0, a)]]
+
+        model.update_data([('a', 1), ('b', 2)])
+
+        self.assertEqual([False, False], [x.isValid() for x in persistent])
+        self.assertEqual('1', model.data(
+            model.index(0, 1, QtCore.QModelIndex()), QtCore.Qt.DisplayRole))
+
+    def test_update_data_columns(self):
+        model = ListModel([('a', 1)])
+        root = model.root_item
+
+        model.update_data([('a', 1, 2)], num_columns=3)
+
+        self.assertEqual(3, model.columnCount(None))
+        self.assertIsNot(root, model.root_item)
+
+    def test_sort(self):
+        the_list = [('b', 2), ('a', 2), ('c', 1), ('a', 1)]
+
+        model = ListModel(the_list)
+        model.sort(0, QtCore.Qt.AscendingOrder)
+        model.sort(1, QtCore.Qt.AscendingOrder)
+
+        self.assertEqual([('a', 1), ('c', 1), ('a', 2), ('b', 2)],
+                         model.root_item.children)
+        self.assertEqual([('b', 2), ('a', 2), ('c', 1), ('a', 1)],
+                         the_list)
+
+        model.sort(1, QtCore.Qt.DescendingOrder)
+
+        self.assertEqual([('a', 2), ('b', 2), ('a', 1), ('c', 1)],
+                         model.root_item.children)
+
+    def test_sort_missing_and_bytes(self):
+        the_list = [('a', None), ('b', 'x'), ('c', float('nan')),
+                    ('d', b'x'), ('e', 1)]
+
+        model = ListModel(the_list)
+        model.sort(1, QtCore.Qt.AscendingOrder)
+
+        self.assertEqual(['e', 'b', 'd', 'a', 'c'],
+                         [x[0] for x in model.root_item.children])
+
+        model.sort(1, QtCore.Qt.DescendingOrder)
+
+        self.assertEqual(['d', 'b', 'e', 'a', 'c'],
+                         [x[0] for x in model.root_item.children])
+
+        model.sort_by([(0, QtCore.Qt.AscendingOrder),
+                       (1, QtCore.Qt.DescendingOrder)])
+        model.sort_by([(1, QtCore.Qt.DescendingOrder)])
+
+        self.assertEqual(['d', 'b', 'e', 'a', 'c'],
+                         [x[0] for x in model.root_item.children])
+
+    def test_unsort(self):
+        the_list = [('b', 1), ('a', 2), ('c', 3)]
+
+        model = ListModel(the_list)
+        model.sort(-1, QtCore.Qt.AscendingOrder)
+
+        self.assertEqual(the_list, model.root_item.children)
+
+        model.sort(0, QtCore.Qt.DescendingOrder)
+        model.sort(-1, QtCore.Qt.AscendingOrder)
+
+        self.assertEqual(the_list, model.root_item.children)
+        self.assertEqual([], model.sort_order)
+        self.assertIsNone(model.permutation)
+
+    def test_sort_keeps_proxies(self):
+        the_list = [('b', None, [('one', 1)]), ('a', None, [])]
+
+        model = ListModel(the_list)
+        b = model.root_item.childAt(0)
+        model.sort(0)
+
+        self.assertIs(b, model.root_item.childAt(1))
+        self.assertEqual(1, b.row)
+
+    def test_sort_moves_persistent_indexes(self):
+        model = ListModel([('b', 2), ('a', None, [('x', 1)]), ('c', 1)])
+        root_index = QtCore.QModelIndex()
+        a = model.index(1, 0, root_index)
+        persistent = [QtCore.QPersistentModelIndex(x)
+                      for x in [model.index(0, 1, root_index), a,
+                                model.index(0, 0, a)]]
+
+        model.sort(1)
+
+        self.assertEqual([1, 2, 0], [x.row() for x in persistent])
+        self.assertEqual('2', model.data(persistent[0],
+                                         QtCore.Qt.DisplayRole))
+        check_persistent_indexes(self, model, persistent)
+
+        model.append_rows([('d', 0)])
+
+        self.assertEqual([2, 3, 0], [x.row() for x in persistent])
+        check_persistent_indexes(self, model, persistent)
+
+    def test_append_sorted(self):
+        model = ListModel([('a', 3), ('b', 1)])
+        model.sort(1)
+
+        model.append_rows([('c', 2), ('d', 1)])
+
+        self.assertEqual([('b', 1), ('d', 1), ('c', 2), ('a', 3)],
+                         model.root_item.children)
+
+    def test_append_adds_columns(self):
+        model = ListModel([])
+        model.append_rows([('a', 1, 2)])
+
+        self.assertEqual(3, model.columnCount(None))
+
+        model = ListModel([('b',), ('a',)])
+        model.sort(0)
+        model.append_rows([('c', 1)])
+
+        self.assertEqual(2, model.columnCount(None))
+        self.assertEqual([('a',), ('b',), ('c', 1)],
+                         model.root_item.children)
+
+
+class TestInspectorModel(unittest.TestCase):
+    def test_attributes(self):
+        class Thing(object):
+            pass
+
+        thing = Thing()
+        thing.name = 'thing'
+        thing.values = [1, 2, 3]
+
+        model = InspectorModel(thing)
+
+        satisfies_QAbstractItemModel(model)
+
+        self.assertTrue(model.hasChildren(QtCore.QModelIndex()))
+        self.assertEquals(2, model.rowCount(QtCore.QModelIndex()))
+
+        values_index = model.index(1, 0, QtCore.QModelIndex())
+        self.assertEquals('values',
+                          model.data(values_index, QtCore.Qt.DisplayRole))
+        self.assertEquals(3, model.rowCount(values_index))
+
+    def test_chunks(self):
+        model = InspectorModel(list(range(2500)), chunk_size=1000)
+
+        root = model.root_item
+        self.assertEqual(3, root.childCount())
+        self.assertEqual('[2000..2499]', root.childAt(2).name)
+        self.assertEqual(500, root.childAt(2).childCount())
+        self.assertEqual(2499, root.childAt(2).childAt(499).obj)
+
+    def test_chunks_max_depth(self):
+        model = InspectorModel([[i] for i in range(2500)], chunk_size=1000,
+                               max_depth=0)
+
+        chunk = model.root_item.childAt(0)
+        self.assertTrue(chunk.mayHaveChildren())
+        self.assertEqual(1000, chunk.childCount())
+        self.assertEqual([5], chunk.childAt(5).obj)
+        self.assertFalse(chunk.childAt(5).mayHaveChildren())
+
+    def test_long_key(self):
+        model = InspectorModel({('x' * 100000,): 1}, repr_length=50)
+
+        self.assertEqual(50, len(model.root_item.childAt(0).name))
+
+    def test_value_text(self):
+        class Slow(object):
+            def __repr__(self):
+                raise AssertionError("The whole repr was asked for")
+
+        class Fields(object):
+            _fields = ('value',)
+            reads = 0
+
+            @property
+            def value(self):
+                Fields.reads += 1
+                return Slow()
+
+        Point = namedtuple('Point', ['x', 'values'])
+        model = InspectorModel([Slow(), Point(1, list(range(3000))),
+                                Fields()])
+
+        def value_text(row):
+            return model.data(model.index(row, 2, QtCore.QModelIndex()),
+                              QtCore.Qt.DisplayRole)
+
+        self.assertEqual('<Slow object>', value_text(0))
+        self.assertEqual('Point(x=1, values=[0, 1, 2, 3, 4, 5, ...])',
+                         value_text(1))
+        self.assertEqual('Fields(value=<Slow object>)', value_text(2))
+        value_text(2)
+        self.assertEqual(1, Fields.reads)
+
+    def test_max_depth(self):
+        model = InspectorModel({'a': {'b': {'c': 1}}}, max_depth=1)
+
+        a = model.root_item.childAt(0)
+        self.assertTrue(a.mayHaveChildren())
+        self.assertFalse(a.childAt(0).mayHaveChildren())
+
+
+class TestSelectedRows(unittest.TestCase):
+    def test_spans(self):
+        root = ListProxy([], [('row', i) for i in range(10)])
+
+        rows = SelectedRows([(root, 2, 4), (root, 7, 7)])
+
+        self.assertEqual(4, len(rows))
+        self.assertEqual(('row', 2), rows[0])
+        self.assertEqual(('row', 7), rows[-1])
+        self.assertEqual([('row', 3), ('row', 4)], rows[1:3])
+        self.assertEqual([2, 3, 4, 7], [x[1] for x in rows])
+        self.assertRaises(IndexError, lambda: rows[4])
+
+    def test_ranges(self):
+        data = [('row', i) for i in range(10)]
+        root = ListProxy([], data)
+
+        rows = SelectedRows([(root, 2, 4)])
+
+        self.assertEqual([(data, 2, 4)], rows.ranges())
+
+    def test_from_selection(self):
+        data = [('row', i) for i in range(10)]
+        data.append(('parent', None, [('child', i) for i in range(5)]))
+        model = ListModel(data)
+        root_index = QtCore.QModelIndex()
+        parent_index = model.index(10, 0, root_index)
+
+        selection = QtGui.QItemSelection()
+        for top, left, bottom, right, parent in [
+                (2, 0, 4, 0, root_index),
+                # Overlapping, in other columns.
+                (3, 1, 5, 1, root_index),
+                # Next to the previous ranges.
+                (6, 0, 6, 1, root_index),
+                (9, 0, 9, 0, root_index),
+                (1, 0, 2, 0, parent_index),
+                (2, 1, 3, 1, parent_index)]:
+            selection.select(model.index(top, left, parent),
+                             model.index(bottom, right, parent))
+
+        rows = SelectedRows.fromSelection(selection, model.root_item)
+
+        self.assertEqual([(data, 2, 6), (data, 9, 9),
+                          (data[10][2], 1, 3)], rows.ranges())
+        self.assertEqual([2, 3, 4, 5, 6, 9, 1, 2, 3], [x[1] for x in rows])
+
+
+class TestSelectionChanged(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QtGui.QApplication.instance() or QtGui.QApplication([])
+
+    def select_row(self, view, row):
+        view.treeView.selectionModel().select(
+            view.model.index(row, 0, QtCore.QModelIndex()),
+            QtGui.QItemSelectionModel.ClearAndSelect |
+            QtGui.QItemSelectionModel.Rows)
+
+    def test_selection_changed(self):
+        view = NestedListTreeView([('a', 1), ('b', 2), ('c', 3)])
+        calls = []
+        view.set_on_selection_changed(
+            lambda selected, deselected: calls.append(
+                (list(selected), list(deselected))))
+
+        self.select_row(view, 1)
+        self.select_row(view, 2)
+
+        self.assertEqual([([('b', 2)], []), ([('c', 3)], [('b', 2)])],
+                         calls)
+        self.assertEqual([('c', 3)], list(view.selected_rows()))
+
+    def test_selection_changed_after_set_data(self):
+        view = NestedListTreeView([('a', 1), ('b', 2)])
+        calls = []
+        view.set_on_selection_changed(
+            lambda selected, deselected: calls.append(list(selected)))
+
+        view.set_data([('x', 1), ('y', 2)])
+        self.select_row(view, 1)
+
+        self.assertEqual([[('y', 2)]], calls)
+
+
+class TestChoiceIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ChoiceIndex(['web-01.example.com', 'web-02.example.com',
+                                  'db-01.example.com', 'Webmail',
+                                  'mail.example.com'])
+
+    def test_not_ready(self):
+        self.assertEqual([], self.index.lookup('web'))
+
+    def test_prefix(self):
+        self.index.build()
+
+        self.assertEqual(['web-01.example.com', 'web-02.example.com',
+                          'Webmail'],
+                         self.index.lookup('we'))
+        self.assertEqual(['web-01.example.com'],
+                         self.index.lookup('web', limit=1))
+
+    def test_substring(self):
+        self.index.build()
+
+        self.assertEqual(['mail.example.com', 'Webmail'],
+                         self.index.lookup('mail'))
+        self.assertEqual(['db-01.example.com', 'web-01.example.com'],
+                         self.index.lookup('-01'))
+
+    def test_incremental(self):
+        self.index.build()
+
+        typed = [self.index.lookup('example.com'[:i])
+                 for i in range(1, 12)]
+
+        fresh = ChoiceIndex(self.index.choices)
+        fresh.build()
+        self.assertEqual(fresh.lookup('example.com'), typed[-1])
+        self.assertEqual(4, len(typed[-1]))
+        self.assertEqual([], self.index.lookup('example.comx'))
+
+
+class StubModel(object):
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.updates = []
+
+    def update_data(self, data, num_columns=None):
+        if self.fail:
+            raise ValueError("Update failed")
+        self.updates.append((data, num_columns))
+
+
+class StubTimer(object):
+    def __init__(self):
+        self.delays = []
+
+    def start(self, delay):
+        self.delays.append(delay)
+
+
+class TestPoller(unittest.TestCase):
+    def make_poller(self, producer=None, model=None):
+        poller = _Poller(producer, model or StubModel(), 100, 1000)
+        poller.timer = StubTimer()
+        return poller
+
+    def test_next_delay(self):
+        poller = self.make_poller()
+
+        self.assertEqual(100, poller.next_delay(50))
+        self.assertEqual(100, poller.next_delay(100))
+        self.assertEqual(300, poller.next_delay(150))
+        self.assertEqual(1000, poller.next_delay(5000))
+
+    def test_apply(self):
+        poller = self.make_poller()
+
+        poller.apply([('a', 1)], b'fingerprint', 2, 0.3)
+
+        self.assertEqual([([('a', 1)], 2)], poller.model.updates)
+        self.assertEqual(b'fingerprint', poller.fingerprint)
+        self.assertEqual([600], poller.timer.delays)
+
+    def test_apply_fails(self):
+        poller = self.make_poller(model=StubModel(fail=True))
+
+        self.assertRaises(ValueError, poller.apply, [('a', 1)],
+                          b'fingerprint', 2, 0.01)
+
+        self.assertIsNone(poller.fingerprint)
+        self.assertEqual([100], poller.timer.delays)
+
+    def test_unchanged(self):
+        data = [('a', 1, 2)]
+        poller = self.make_poller(producer=lambda: data)
+        poller.fingerprint = _fingerprint(data)
+
+        poller._produce()
+
+        self.assertEqual([], poller.model.updates)
+        self.assertEqual([100], poller.timer.delays)
+
+        data = [('b', 1)]
+        poller._produce()
+
+        self.assertEqual([([('b', 1)], 2)], poller.model.updates)
+        self.assertEqual(_fingerprint(data), poller.fingerprint)
+        self.assertEqual([100, 100], poller.timer.delays)